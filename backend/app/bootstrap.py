@@ -6,39 +6,99 @@
 from __future__ import annotations
 
 import asyncio
+import atexit
+import contextlib
 import json
 import logging
+import operator
 import os
+import sys
 import time
 import traceback
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
-from typing import Any, Dict, Tuple, Optional, Callable
+from typing import Any, Dict, List, Tuple, Optional, Callable
+
+try:
+    import orjson
+
+    def _json_loads(body: bytes) -> Any:
+        return orjson.loads(body)
+
+    def _json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+except ImportError:  # pragma: no cover - stdlib fallback when orjson is unavailable
+
+    def _json_loads(body: bytes) -> Any:
+        return json.loads(body.decode("utf-8", errors="ignore"))
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+try:
+    import xxhash
+
+    def _signature(message: str, stack: str, source: str, line: int, col: int) -> int:
+        h = xxhash.xxh3_64()
+        for part in (message, stack, source):
+            h.update(part.encode("utf-8", "surrogatepass"))
+            h.update(b"|")
+        h.update(b"%d|%d" % (line, col))
+        return h.intdigest()
+
+except ImportError:  # pragma: no cover - builtin hash fallback when xxhash is unavailable
+
+    def _signature(message: str, stack: str, source: str, line: int, col: int) -> int:
+        return hash((message, stack, source, line, col))
+
 
 LOG_DIR = os.getenv("LOG_DIR", "logs")
 BACKEND_ERR_FILE = os.path.join(LOG_DIR, "backend-error.log")
 FRONTEND_ERR_FILE = os.path.join(LOG_DIR, "frontend-error.log")
+_FLUSH_NOW_SEVERITIES = frozenset({"fatal", "error"})
+_PAYLOAD_FIELDS = (
+    "message",
+    "stack",
+    "source",
+    "url",
+    "userAgent",
+    "componentStack",
+    "severity",
+    "line",
+    "col",
+)
+_get_payload_fields = operator.itemgetter(*_PAYLOAD_FIELDS)
+
+
+def _payload_fields(data: Dict[str, Any]) -> Tuple[Any, ...]:
+    try:
+        return _get_payload_fields(data)
+    except KeyError:
+        return tuple(map(data.get, _PAYLOAD_FIELDS))
 
 
 def _ensure_bootstrap_logger() -> logging.Logger:
     os.makedirs(LOG_DIR, exist_ok=True)
     logger = logging.getLogger("bootstrap")
-    if not logger.handlers:
-        handler = RotatingFileHandler(
-            BACKEND_ERR_FILE,
-            maxBytes=5_242_880,
-            backupCount=5,
-            encoding="utf-8",
-        )
-        formatter = logging.Formatter(
-            "%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-            "%Y-%m-%dT%H:%M:%S%z",
-        )
-        handler.setFormatter(formatter)
-        handler.setLevel(logging.ERROR)
-        logger.addHandler(handler)
-        logger.setLevel(logging.ERROR)
-        logger.propagate = False
+    if any(isinstance(h, RotatingFileHandler) for h in logger.handlers):
+        return logger
+    handler = RotatingFileHandler(
+        BACKEND_ERR_FILE,
+        maxBytes=52_428_800,
+        backupCount=5,
+        encoding="utf-8",
+    )
+    formatter = logging.Formatter(
+        "%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+        "%Y-%m-%dT%H:%M:%S%z",
+    )
+    handler.setFormatter(formatter)
+    handler.setLevel(logging.ERROR)
+    logger.addHandler(handler)
+    logger.setLevel(logging.ERROR)
+    logger.propagate = False
     return logger
 
 
@@ -46,48 +106,254 @@ _bootstrap_logger = _ensure_bootstrap_logger()
 
 
 def _safe_trunc(s: Any, n: int = 2000) -> str:
-    try:
-        text = str(s)
-    except Exception:
-        text = repr(s)
+    if s is None:
+        return ""
+    text = s if type(s) is str else str(s)
     if len(text) > n:
         return text[: n - 1] + "…"
     return text
 
 
-def _headers_to_dict(raw_headers: Any) -> Dict[str, str]:
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+
+def _safe_int(value: Any) -> int:
     try:
-        return {k.decode("latin1").lower(): v.decode("latin1") for k, v in raw_headers or []}
+        number = int(value or 0)
     except Exception:
-        return {}
+        return 0
+    return number if _INT64_MIN <= number <= _INT64_MAX else 0
+
+
+_JSON_HEADERS = ((b"content-type", b"application/json"),)
+_PREFLIGHT_HEADERS = (
+    (b"access-control-allow-credentials", b"true"),
+    (b"access-control-allow-methods", b"POST"),
+    (b"access-control-allow-headers", b"content-type"),
+    (b"access-control-max-age", b"86400"),
+    (b"vary", b"origin"),
+)
+
+
+def _static_response(status: int, body: bytes, headers: Tuple = _JSON_HEADERS) -> Tuple[dict, dict]:
+    return (
+        {"type": "http.response.start", "status": status, "headers": headers},
+        {"type": "http.response.body", "body": body},
+    )
+
+
+_RESPONSES: Dict[int, Tuple[dict, dict]] = {
+    204: _static_response(204, b""),
+    400: _static_response(400, b'{"detail":"invalid json"}'),
+    413: _static_response(413, b'{"detail":"payload too large"}'),
+    415: _static_response(415, b'{"detail":"unsupported media type"}'),
+    429: _static_response(429, b'{"detail":"rate limited"}'),
+}
+
+
+def _preflight_responses(origins: Tuple[str, ...]) -> Dict[bytes, Tuple[dict, dict]]:
+    responses = {}
+    for origin in origins:
+        origin_b = origin.encode("latin1")
+        headers = ((b"access-control-allow-origin", origin_b), *_PREFLIGHT_HEADERS)
+        responses[origin_b] = _static_response(204, b"", headers)
+    return responses
+
+
+async def _send_static(send: Callable, response: Tuple[dict, dict]) -> None:
+    start, body = response
+    await send(start)
+    await send(body)
+
+
+async def _respond(send: Callable, status_code: int) -> None:
+    await _send_static(send, _RESPONSES[status_code])
+
+
+def _get_headers(raw_headers: Any, *names: bytes) -> List[bytes]:
+    values = [b""] * len(names)
+    for key, value in raw_headers or ():
+        key = key.lower()
+        for i, name in enumerate(names):
+            if key == name:
+                values[i] = value
+    return values
 
 
 class _ClientErrorProxy:
     """
     Minimal ASGI wrapper that intercepts POST /api/client-error and appends a JSON line
-    to logs/frontend-error.log. Keeps things dependency-free and avoids touching app.main.
+    to logs/frontend-error.log. Uses orjson/xxhash when installed (stdlib otherwise) and avoids touching app.main.
     """
 
-    def __init__(self, app: Callable, log_dir: str = LOG_DIR) -> None:
+    def __init__(
+        self, app: Callable, log_dir: str = LOG_DIR, allowed_origins: Tuple[str, ...] = ()
+    ) -> None:
         self.app = app
         self.log_dir = log_dir
         os.makedirs(self.log_dir, exist_ok=True)
         self.out_path = Path(self.log_dir) / "frontend-error.log"
-        # rate limiting: max 20 events / 10s per ip
-        self._rate: Dict[str, Tuple[float, int]] = {}
-        self._rate_window = 10.0
-        self._rate_max = 20
+        self._target_path = sys.intern("/api/client-error")
+        self._post = sys.intern("POST")
+        self._options = sys.intern("OPTIONS")
+        # preflights from allowed origins are answered here; others fall through to CORSMiddleware
+        self._preflights = _preflight_responses(allowed_origins)
+        # buffered appends: one long-lived O_APPEND fd, flushed every 30s, at 64 KiB, or immediately for errors
+        self._fd = self._open_fd()
+        self._buf = bytearray()
+        self._flush_lock = asyncio.Lock()
+        self._flush_interval = 30.0
+        self._flush_threshold = 1 << 16
+        self._flusher_task: Optional[asyncio.Task] = None
+        # pre-serialized '{"ts":...,"origin":"browser",' record prefix, rebuilt once per second
+        self._ts_cache: Tuple[int, bytes] = (0, b"")
+        atexit.register(self._drain)
+        # rate/dedupe state is kept in two generations; each window the older dict is dropped whole
+        now = time.monotonic()
+        # rate limiting: token bucket per ip, bursts of 20 refilled at 20 / 10s (full again long before 60s)
+        self._rate_cur: Dict[str, Tuple[float, float]] = {}
+        self._rate_prev: Dict[str, Tuple[float, float]] = {}
+        self._rate_capacity = 20.0
+        self._rate_refill = 20.0 / 10.0
+        self._rate_window = 60.0
+        self._rate_roll_at = now + self._rate_window
         # simple dedupe: 5s ttl for exact same signature
-        self._dedupe: Dict[str, float] = {}
+        self._dedupe_cur: Dict[int, float] = {}
+        self._dedupe_prev: Dict[int, float] = {}
         self._dedupe_ttl = 5.0
+        self._dedupe_roll_at = now + self._dedupe_ttl
+
+    def _roll(self, now: float) -> None:
+        if now >= self._rate_roll_at:
+            self._rate_prev = self._rate_cur
+            self._rate_cur = {}
+            self._rate_roll_at = now + self._rate_window
+        if now >= self._dedupe_roll_at:
+            self._dedupe_prev = self._dedupe_cur
+            self._dedupe_cur = {}
+            self._dedupe_roll_at = now + self._dedupe_ttl
+
+    def _take_token(self, client_ip: str, now: float) -> bool:
+        bucket = self._rate_cur.get(client_ip) or self._rate_prev.get(client_ip)
+        tokens, last_refill = bucket or (self._rate_capacity, now)
+        tokens = min(self._rate_capacity, tokens + (now - last_refill) * self._rate_refill)
+        allowed = tokens >= 1.0
+        if allowed:
+            tokens -= 1.0
+        self._rate_cur[client_ip] = (tokens, now)
+        return allowed
+
+    def _is_duplicate(self, sig: int, now: float) -> bool:
+        exp = self._dedupe_cur.get(sig) or self._dedupe_prev.get(sig)
+        if exp and exp > now:
+            return True
+        self._dedupe_cur[sig] = now + self._dedupe_ttl
+        return False
+
+    def _record_prefix(self) -> bytes:
+        sec = int(time.time())
+        if sec != self._ts_cache[0]:
+            ts = time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(sec)).encode()
+            self._ts_cache = (sec, b'{"ts":"' + ts + b'","origin":"browser",')
+        return self._ts_cache[1]
+
+    def _open_fd(self) -> int:
+        return os.open(
+            self.out_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC, 0o644
+        )
+
+    def _reopen_if_rotated(self) -> None:
+        # main.py's RotatingFileHandler renames this file on rollover; follow the path, not the inode.
+        opened = os.fstat(self._fd)
+        try:
+            current = os.stat(self.out_path)
+        except FileNotFoundError:
+            current = None
+        if current is None or (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino):
+            stale, self._fd = self._fd, self._open_fd()
+            os.close(stale)
+
+    def _write(self, data: bytes) -> None:
+        try:
+            self._reopen_if_rotated()
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self._fd, view) :]
+        except Exception:
+            # Best-effort; do not fail the app if logging fails
+            pass
+
+    def _append_unbuffered(self, data: bytes) -> None:
+        try:
+            with self.out_path.open("ab") as f:
+                f.write(data)
+        except Exception:
+            # Best-effort; do not fail the app if logging fails
+            pass
+
+    async def _flush(self) -> None:
+        async with self._flush_lock:
+            await self._flush_buffer()
+
+    async def _flush_buffer(self) -> None:
+        if not self._buf or self._fd < 0:
+            return
+        data = bytes(self._buf)
+        self._buf.clear()
+        write = asyncio.ensure_future(asyncio.to_thread(self._write, data))
+        try:
+            await asyncio.shield(write)
+        except asyncio.CancelledError:
+            # The worker thread keeps running; hold the lock until it is done with the fd.
+            await write
+            raise
+
+    async def _flusher(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await self._flush()
+
+    def _drain(self) -> None:
+        if self._buf and self._fd >= 0:
+            self._write(bytes(self._buf))
+            self._buf.clear()
+
+    async def aclose(self) -> None:
+        task, self._flusher_task = self._flusher_task, None
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        async with self._flush_lock:
+            await self._flush_buffer()
+            if self._fd >= 0:
+                os.close(self._fd)
+                self._fd = -1
+
+    def _lifespan_receive(self, receive: Callable) -> Callable:
+        async def _receive():
+            message = await receive()
+            if message.get("type") == "lifespan.shutdown":
+                await self.aclose()
+            return message
+
+        return _receive
 
     async def __call__(self, scope, receive, send):
-        if scope.get("type") != "http":
+        scope_type = scope["type"]
+        if scope_type == "lifespan":
+            return await self.app(scope, self._lifespan_receive(receive), send)
+        # ASGI servers pass methods uppercased; str != short-circuits on identity for interned values.
+        if scope_type != "http" or scope["path"] != self._target_path:
             return await self.app(scope, receive, send)
-
-        path = scope.get("path") or ""
-        method = (scope.get("method") or "GET").upper()
-        if path != "/api/client-error" or method != "POST":
+        method = scope["method"]
+        if method != self._post:
+            if method == self._options:
+                (origin,) = _get_headers(scope.get("headers"), b"origin")
+                preflight = self._preflights.get(origin)
+                if preflight is not None:
+                    return await _send_static(send, preflight)
             return await self.app(scope, receive, send)
 
         # Read body with cap
@@ -103,30 +369,21 @@ class _ClientErrorProxy:
             if not message.get("more_body"):
                 break
 
-        # Prepare helpers to send responses
-        async def _respond(status_code: int, payload: Optional[dict] = None):
-            headers = [(b"content-type", b"application/json")]
-            await send({"type": "http.response.start", "status": status_code, "headers": headers})
-            if payload is None:
-                await send({"type": "http.response.body", "body": b""})
-            else:
-                await send({"type": "http.response.body", "body": json.dumps(payload).encode("utf-8")})
-
         if too_large:
-            return await _respond(413, {"detail": "payload too large"})
+            return await _respond(send, 413)
 
         # Basic content-type check
-        headers = _headers_to_dict(scope.get("headers"))
-        ctype = headers.get("content-type", "")
-        if "application/json" not in ctype:
-            return await _respond(415, {"detail": "unsupported media type"})
+        ctype, xfwd = _get_headers(scope.get("headers"), b"content-type", b"x-forwarded-for")
+        if b"application/json" not in ctype:
+            return await _respond(send, 415)
 
+        # Reject empty bodies, arrays, scalars and garbage without raising a parser exception
+        if body.lstrip(b" \t\r\n")[:1] != b"{":
+            return await _respond(send, 400)
         try:
-            data = json.loads(body.decode("utf-8", errors="ignore"))
-            if not isinstance(data, dict):
-                raise ValueError("expected object")
-        except Exception:
-            return await _respond(400, {"detail": "invalid json"})
+            data = _json_loads(body)
+        except (ValueError, RecursionError):
+            return await _respond(send, 400)
 
         # Rate limit per IP
         client_ip = ""
@@ -135,46 +392,31 @@ class _ClientErrorProxy:
                 client_ip = str(scope["client"][0])
             except Exception:
                 client_ip = ""
-        xfwd = headers.get("x-forwarded-for", "")
         if xfwd:
-            client_ip = xfwd.split(",")[0].strip() or client_ip
+            client_ip = xfwd.split(b",", 1)[0].strip().decode("latin1") or client_ip
 
         now = time.monotonic()
-        win_ts, cnt = self._rate.get(client_ip, (now, 0))
-        if now - win_ts > self._rate_window:
-            win_ts, cnt = now, 0
-        cnt += 1
-        self._rate[client_ip] = (win_ts, cnt)
-        if cnt > self._rate_max:
-            return await _respond(429, {"detail": "rate limited"})
+        self._roll(now)
+        if not self._take_token(client_ip, now):
+            return await _respond(send, 429)
 
         # Normalize payload
-        message = _safe_trunc(data.get("message"))
-        stack = _safe_trunc(data.get("stack"))
-        source = _safe_trunc(data.get("source"))
-        url = _safe_trunc(data.get("url"))
-        ua = _safe_trunc(data.get("userAgent"))
-        component_stack = _safe_trunc(data.get("componentStack"))
-        severity = _safe_trunc(data.get("severity") or "error")
-        try:
-            line = int(data.get("line") or 0)
-        except Exception:
-            line = 0
-        try:
-            col = int(data.get("col") or 0)
-        except Exception:
-            col = 0
+        message, stack, source, url, ua, component_stack, severity, line, col = _payload_fields(data)
+        message = _safe_trunc(message)
+        stack = _safe_trunc(stack)
+        source = _safe_trunc(source)
+        url = _safe_trunc(url)
+        ua = _safe_trunc(ua)
+        component_stack = _safe_trunc(component_stack)
+        severity = _safe_trunc(severity or "error")
+        line = _safe_int(line)
+        col = _safe_int(col)
 
         # Dedupe exact signature briefly
-        sig = f"{message}|{stack}|{source}|{line}|{col}"
-        exp = self._dedupe.get(sig)
-        if exp and exp > now:
-            return await _respond(204)
-        self._dedupe[sig] = now + self._dedupe_ttl
+        if self._is_duplicate(_signature(message, stack, source, line, col), now):
+            return await _respond(send, 204)
 
         record = {
-            "ts": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
-            "origin": "browser",
             "ip": client_ip,
             "userAgent": ua,
             "url": url,
@@ -188,22 +430,32 @@ class _ClientErrorProxy:
         }
 
         try:
-            with self.out_path.open("a", encoding="utf-8") as f:
-                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            line_bytes = self._record_prefix() + _json_dumps(record)[1:] + b"\n"
         except Exception:
             # Best-effort; do not fail the app if logging fails
-            pass
+            return await _respond(send, 204)
+        if self._fd < 0:
+            # Already shut down: append directly instead of buffering behind a closed fd
+            self._append_unbuffered(line_bytes)
+            return await _respond(send, 204)
+        self._buf += line_bytes
+        if self._flusher_task is None:
+            self._flusher_task = asyncio.create_task(self._flusher())
+        if severity in _FLUSH_NOW_SEVERITIES or len(self._buf) >= self._flush_threshold:
+            await self._flush()
 
-        return await _respond(204)
+        return await _respond(send, 204)
 
 
 # Try importing the real ASGI app and wrap it.
 try:
-    from app.main import app as asgi  # type: ignore[attr-defined]
-    asgi = _ClientErrorProxy(asgi, LOG_DIR)
-except Exception:
+    from app.main import CORS_ORIGINS, app as asgi  # type: ignore[attr-defined]
+    asgi = _ClientErrorProxy(asgi, LOG_DIR, CORS_ORIGINS)
+except Exception as exc:
+    # Keep only the innermost frames so crash-looping imports log quickly and compactly.
+    tb = traceback.TracebackException.from_exception(exc, limit=-20, lookup_lines=False)
     _bootstrap_logger.error(
         "Failed to import application module 'app.main:app'. Traceback follows:\n%s",
-        traceback.format_exc(),
+        "".join(tb.format()),
     )
     raise
@@ -1,22 +1,27 @@
 # backend/app/main.py
-# Purpose: Define the FastAPI app and configure robust logging. Register a proper ASGI middleware for exception logging using add_middleware so all errors are captured in /logs.
+# Purpose: Define the FastAPI app and configure robust logging with file writes and rotation on background queue listeners. Register a catch-all exception handler so unhandled errors are logged to /logs without wrapping every request.
 # Imports From: None
 # Exported To: ./bootstrap.py
 from __future__ import annotations
 
+import atexit
 import datetime
 import logging
 import logging.config
 import os
 import sys
 import traceback
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from logging.handlers import QueueListener
 from typing import Any
 
-import numpy as np
-import requests
-from fastapi import FastAPI, Request
+import httpx
+from fastapi import FastAPI, Request, Response
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
 
 # ---- Paths -------------------------------------------------------------------
 LOG_DIR = os.getenv("LOG_DIR", "/logs")
@@ -37,18 +42,38 @@ def _rotating_file_handler_dict(filename: str, level: str) -> dict[str, Any]:
         "class": "logging.handlers.RotatingFileHandler",
         "level": level,
         "filename": filename,
-        "maxBytes": 5_242_880,
+        "maxBytes": 52_428_800,
         "backupCount": 5,
         "encoding": "utf-8",
         "formatter": "default",
     }
 
 
+def _queue_handler_dict(target: str) -> dict[str, Any]:
+    return {
+        "class": "logging.handlers.QueueHandler",
+        "queue": "queue.SimpleQueue",
+        "handlers": [target],
+        "respect_handler_level": True,
+    }
+
+
+_LOG_QUEUE_HANDLERS = ("backend_file", "frontend_file")
+_log_listeners: list[QueueListener] = []
+
+
+def stop_log_listeners() -> None:
+    while _log_listeners:
+        _log_listeners.pop().stop()
+
+
 def configure_logging() -> None:
     _ensure_log_dir()
+    stop_log_listeners()
 
     config = {
         "version": 1,
+        "incremental": False,
         "disable_existing_loggers": False,
         "formatters": {
             "default": {
@@ -57,8 +82,10 @@ def configure_logging() -> None:
             }
         },
         "handlers": {
-            "backend_file": _rotating_file_handler_dict(BACKEND_ERROR_FILE, "ERROR"),
-            "frontend_file": _rotating_file_handler_dict(FRONTEND_ERROR_FILE, "ERROR"),
+            "backend_rotating": _rotating_file_handler_dict(BACKEND_ERROR_FILE, "ERROR"),
+            "frontend_rotating": _rotating_file_handler_dict(FRONTEND_ERROR_FILE, "ERROR"),
+            "backend_file": _queue_handler_dict("backend_rotating"),
+            "frontend_file": _queue_handler_dict("frontend_rotating"),
         },
         "loggers": {
             "uvicorn": {
@@ -90,20 +117,14 @@ def configure_logging() -> None:
         "root": {"level": "ERROR", "handlers": ["backend_file"]},
     }
 
-    # Avoid duplicated handlers in reload scenarios.
-    for name in (
-        "",
-        "uvicorn",
-        "uvicorn.error",
-        "uvicorn.access",
-        "fastapi",
-        "frontend.client",
-    ):
-        logger = logging.getLogger(name)
-        logger.handlers.clear()
-
+    # A non-incremental dictConfig replaces the handlers of every configured logger.
     logging.config.dictConfig(config)
 
+    for name in _LOG_QUEUE_HANDLERS:
+        listener = logging.getHandlerByName(name).listener
+        listener.start()
+        _log_listeners.append(listener)
+
     # Ensure log files exist so they can be tailed immediately.
     try:
         for f in (BACKEND_ERROR_FILE, FRONTEND_ERROR_FILE):
@@ -124,50 +145,47 @@ def configure_logging() -> None:
 
 
 configure_logging()
+atexit.register(stop_log_listeners)
 
 
 # ---- FastAPI App --------------------------------------------------------------
-app = FastAPI()
-
-
-# ---- Exception Logging Middleware (ASGI) --------------------------------------
-class ExceptionLoggingMiddleware:
-    # Purpose: Capture any unhandled exceptions during request handling and log them with path and client IP.
-    # Imports From: None
-    # Exported To: FastAPI app via add_middleware
-    def __init__(self, app: FastAPI):
-        self.app = app
-        self.logger = logging.getLogger("uvicorn.error")
-
-    async def __call__(self, scope, receive, send):
-        if scope["type"] != "http":
-            return await self.app(scope, receive, send)
-
-        try:
-            return await self.app(scope, receive, send)
-        except Exception:
-            path = scope.get("path")
-            client = scope.get("client")
-            client_ip = (
-                client[0] if isinstance(client, (tuple, list)) and client else None
-            )
-            self.logger.exception(
-                "Unhandled exception | path=%s | ip=%s", path, client_ip
-            )
-            raise
-
-
-# Register logging middleware first so it wraps the entire stack.
-app.add_middleware(ExceptionLoggingMiddleware)
-
-# CORS should come after logging so CORS errors are captured too.
-origins = [
+@asynccontextmanager
+async def lifespan(fastapi_app: FastAPI) -> AsyncIterator[None]:
+    async with httpx.AsyncClient(
+        timeout=5,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        http2=True,
+    ) as http:
+        fastapi_app.state.http = http
+        yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+# ---- Exception Logging -------------------------------------------------------
+# Starlette's outermost ServerErrorMiddleware calls this only when a request fails,
+# then re-raises, so the happy path pays for no extra try/except frame.
+@app.exception_handler(Exception)
+async def log_unhandled_exception(request: Request, exc: Exception) -> PlainTextResponse:
+    client_ip = request.client.host if request.client else None
+    logging.getLogger("uvicorn.error").error(
+        "Unhandled exception | path=%s | ip=%s",
+        request.url.path,
+        client_ip,
+        exc_info=exc,
+    )
+    return PlainTextResponse("Internal Server Error", status_code=500)
+
+
+# ---- CORS --------------------------------------------------------------------
+CORS_ORIGINS = (
     "http://localhost",
     "http://localhost:5173",
-]
+)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=origins,
+    allow_origins=list(CORS_ORIGINS),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -183,15 +201,16 @@ def read_root() -> dict[str, Any]:
     }
 
 
-@app.get("/api/external-data")
-def get_external_data() -> dict[str, Any]:
+@app.get("/api/external-data", response_model=None)
+async def get_external_data(request: Request) -> Response | dict[str, Any]:
     try:
-        response = requests.get(
-            "https://jsonplaceholder.typicode.com/todos/1", timeout=5
+        response = await request.app.state.http.get(
+            "https://jsonplaceholder.typicode.com/todos/1"
         )
         response.raise_for_status()  # Raise an exception for bad status codes
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        # Relay the upstream JSON bytes as-is instead of decoding and re-encoding them
+        return Response(content=response.content, media_type="application/json")
+    except httpx.HTTPError as e:
         # Log the error and return a user-friendly message
         logging.getLogger("fastapi").error("Failed to fetch external data: %s", e)
         return {"error": "Failed to fetch data from external service."}
@@ -199,6 +218,8 @@ def get_external_data() -> dict[str, Any]:
 
 # ---- Frontend Error Intake ----------------------------------------------------
 class FrontendErrorPayload(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
     message: str
     stack: str | None = None
     source: str | None = None
@@ -208,10 +229,29 @@ class FrontendErrorPayload(BaseModel):
     userAgent: str | None = None
 
 
-@app.post("/api/logs/frontend")
-def log_frontend_error(
-    payload: FrontendErrorPayload, request: Request
-) -> dict[str, str]:
+_FrontendErrorAdapter = TypeAdapter(FrontendErrorPayload)
+
+
+@app.post(
+    "/api/logs/frontend",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": FrontendErrorPayload.model_json_schema()}
+            },
+        }
+    },
+)
+async def log_frontend_error(request: Request) -> dict[str, str]:
+    body = await request.body()
+    try:
+        payload = _FrontendErrorAdapter.validate_json(body)
+    except ValidationError as e:
+        errors = [
+            {**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)
+        ]
+        raise RequestValidationError(errors, body=body) from e
     client_ip = request.client.host if request.client else None
     logger = logging.getLogger("frontend.client")
     logger.error(